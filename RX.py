@@ -1,6 +1,8 @@
 # Importación de librerías necesarias
 import struct      # Para empaquetar/desempaquetar datos binarios
 import utime       # Funciones de temporización para MicroPython
+import uasyncio as asyncio  # Planificador cooperativo de tareas
+import _thread     # Segundo núcleo del RP2040 para la pantalla OLED
 from machine import Pin, SPI, I2C  # Módulos para control de GPIO, SPI e I2C
 from nrf24l01 import NRF24L01      # Librería para controlar el transceptor NRF24L01
 import ssd1306     # Controlador para pantallas OLED basadas en SSD1306
@@ -12,15 +14,29 @@ MOSI_PIN = 3    # Pin Master Out Slave In (datos salientes)
 MISO_PIN = 4    # Pin Master In Slave Out (datos entrantes)
 CSN_PIN = 5     # Pin Chip Select (selección de chip)
 CE_PIN = 6      # Pin Chip Enable (habilitación de chip)
+SPI_BAUDRATE = 8_000_000  # Reloj SPI en Hz (el NRF24L01 admite hasta 10 MHz)
+IRQ_PIN = None  # Pin IRQ del NRF24L01 (p. ej. 7), None si no está cableado
 
 # --- Configuración de pines I2C para pantalla OLED ---
 I2C_SDA = 14    # Pin de datos I2C
 I2C_SCL = 15    # Pin de reloj I2C
+I2C_FREQ = 1_000_000  # Frecuencia del bus I2C en Hz
 WIDTH = 128     # Ancho de la pantalla OLED en píxeles
 HEIGHT = 64     # Alto de la pantalla OLED en píxeles
+OLED_ADDR = 0x3C  # Dirección I2C del controlador SSD1306
+RSSI_Y = 35     # Fila en píxeles donde se dibuja el valor RSSI
+
+# Imprime por consola cada RSSI recibido (solo para depuración: formatear
+# e imprimir cada línea cuesta más que recibir el paquete)
+DEBUG = False
 
 # LED integrado en la placa para indicación visual
 led = Pin("LED", Pin.OUT)
+# Métodos ligados guardados para no resolverlos en cada ráfaga. En la Pico W
+# el LED está conectado al chip CYW43, así que no se puede escribir
+# directamente en los registros GPIO del RP2040
+led_on = led.on
+led_off = led.off
 
 # --- Configuración de parámetros RF ---
 CANAL_RF = 46                    # Canal de radiofrecuencia (0-125)
@@ -28,22 +44,99 @@ TX_ADDRESS = b"\xe1\xf0\xf0\xf0\xf0"  # Dirección del transmisor (5 bytes)
 RX_ADDRESS = b"\xd2\xf0\xf0\xf0\xf0"  # Dirección receptora para respuestas
 DATA_RATE = 1  # Tasa de datos: 0=1Mbps, 1=2Mbps, 2=250Kbps
 RF_POWER = 3   # Potencia RF: 0=-18dBm, 1=-12dBm, 2=-6dBm, 3=0dBm (máxima)
+NUM_MEDICIONES = 10  # Mediciones de RSSI que llegan en cada paquete
+# Formato del paquete: número de secuencia (uint16) y las 10 mediciones
+# (int16); debe coincidir con el transmisor
+MSG_FMT = "<H%dh" % NUM_MEDICIONES
+PAYLOAD_SIZE = struct.calcsize(MSG_FMT)  # Tamaño del paquete (22 bytes)
 
 # --- Inicialización de la pantalla OLED ---
-i2c = I2C(1, scl=Pin(I2C_SCL), sda=Pin(I2C_SDA))
-oled = ssd1306.SSD1306_I2C(WIDTH, HEIGHT, i2c)
+# I2C a 1 MHz (Fast-mode Plus, soportado por el RP2040 y el SSD1306);
+# requiere resistencias pull-up de 2.2 kΩ o menos
+i2c = I2C(1, scl=Pin(I2C_SCL), sda=Pin(I2C_SDA), freq=I2C_FREQ)
+oled = ssd1306.SSD1306_I2C(WIDTH, HEIGHT, i2c, addr=OLED_ADDR)
+
+# Ventana de escritura a toda la pantalla en modo horizontal para el envío
+# inicial del framebuffer en una sola ráfaga
+for cmd in (0x20, 0x00,         # Modo de direccionamiento horizontal
+            0x21, 0, WIDTH - 1,  # Columnas 0-127
+            0x22, 0, HEIGHT // 8 - 1):  # Páginas 0-7
+    oled.write_cmd(cmd)
+
+# Pre-renderiza la etiqueta fija una sola vez y la envía completa
+oled.fill(0)
+oled.text("Mensaje recibido:", 0, 0)
+static_buf = bytes(oled.buffer)
+i2c.writevto(OLED_ADDR, (b"\x40", oled.buffer))
+
+# El texto del RSSI (8 px de alto) ocupa las páginas 4 y 5: solo esos
+# 256 bytes se reenvían en cada refresco
+RSSI_PAG_INI = RSSI_Y // 8
+RSSI_PAG_FIN = (RSSI_Y + 7) // 8
+RSSI_VENTANA = bytes((0x00, 0x21, 0, WIDTH - 1, 0x22, RSSI_PAG_INI, RSSI_PAG_FIN))
+rssi_paginas = memoryview(oled.buffer)[RSSI_PAG_INI * WIDTH:(RSSI_PAG_FIN + 1) * WIDTH]
+
+class NRF24L01Rapido(NRF24L01):
+    """
+    NRF24L01 que aprovecha el byte STATUS devuelto gratis en cada comando SPI
+    para saber si quedan paquetes sin leer registros adicionales
+    """
+    def leer_status(self):
+        """
+        Lee STATUS con un único comando NOP (0xFF) de un byte
+        """
+        self.cs(0)
+        self.spi.readinto(self.buf, 0xFF)
+        self.cs(1)
+        return self.buf[0]
+
+    def any(self):
+        # Bits 3-1 (RX_P_NO): tubería del paquete en cabeza, 7 = FIFO vacío
+        return ((self.leer_status() >> 1) & 0x07) <= 5
+
+    def recv_into(self, buf):
+        """
+        Como recv(), pero copia el paquete en un búfer preasignado de
+        payload_size bytes para no crear un objeto nuevo por paquete
+        """
+        self.cs(0)
+        self.spi.readinto(self.buf, 0x61)  # R_RX_PAYLOAD
+        self.spi.readinto(buf)
+        self.cs(1)
+        # Limpia RX_DR; el STATUS devuelto ya refleja el FIFO tras sacar
+        # el paquete y se guarda para quedan_paquetes()
+        self._status = self.reg_write(0x07, 0x40)
+
+    def quedan_paquetes(self):
+        """
+        Como any(), pero usando el STATUS del último recv_into(), sin
+        ninguna transacción SPI adicional
+        """
+        return ((self._status >> 1) & 0x07) <= 5
+
+# Último RSSI recibido y marca de que aún no se ha mostrado en la OLED;
+# los paquetes intermedios de una ráfaga se descartan para la pantalla.
+# Se comparten entre núcleos, protegidos por oled_lock
+latest_rssi = None
+dirty = False
+oled_lock = _thread.allocate_lock()
 
 def setup_nrf24l01():
     """
     Configura e inicializa el módulo NRF24L01 en modo receptor
     """
     # Inicialización del bus SPI con los pines definidos
-    spi = SPI(SPI_ID, sck=Pin(SCK_PIN), mosi=Pin(MOSI_PIN), miso=Pin(MISO_PIN))
+    spi = SPI(SPI_ID, baudrate=SPI_BAUDRATE, polarity=0, phase=0,
+              sck=Pin(SCK_PIN), mosi=Pin(MOSI_PIN), miso=Pin(MISO_PIN))
     csn = Pin(CSN_PIN, mode=Pin.OUT, value=1)  # CSN inicia en alto (inactivo)
     ce = Pin(CE_PIN, mode=Pin.OUT, value=0)    # CE inicia en bajo (standby)
     
-    # Creación del objeto NRF24L01 con tamaño de paquete de 8 bytes
-    nrf = NRF24L01(spi, csn, ce, payload_size=8)
+    # Creación del objeto NRF24L01 con el tamaño de paquete del protocolo
+    nrf = NRF24L01Rapido(spi, csn, ce, payload_size=PAYLOAD_SIZE)
+    # El driver reconfigura el SPI a 4 MHz al crearse: se restaura la
+    # frecuencia deseada. El retardo CE->CSN (Tpece2csn, 4 µs) ya lo cumplen
+    # las esperas del driver tras subir CE (15 µs al enviar, 130 µs al escuchar)
+    nrf.init_spi(SPI_BAUDRATE)
     
     # Configuración del canal RF
     nrf.set_channel(CANAL_RF)
@@ -65,6 +158,10 @@ def setup_nrf24l01():
     nrf.open_tx_pipe(RX_ADDRESS)    # Para enviar respuesta si es necesario
     nrf.open_rx_pipe(1, TX_ADDRESS) # Canal 1 escucha al transmisor
     
+    # Recepción sin confirmación, igual que el transmisor: no se envían ACK
+    nrf.reg_write(0x01, 0x00)  # EN_AA: auto-ACK desactivado en todas las tuberías
+    nrf.reg_write(0x04, 0x00)  # SETUP_RETR: sin retransmisiones automáticas
+    
     print(f"NRF24L01 receptor en canal {CANAL_RF}")
     return nrf
 
@@ -75,46 +172,100 @@ def mostrar_en_oled(rssi):
     Args:
         rssi: Valor RSSI en dBm
     """
-    oled.fill(0)  # Limpia la pantalla
-    oled.text("Mensaje recibido:", 0, 0)
-    oled.text(f"RSSI: {rssi} dBm", 0, 35)
-    oled.show()  # Actualiza la pantalla
+    oled.buffer[:] = static_buf  # Restaura la etiqueta pre-renderizada
+    oled.text(f"RSSI: {rssi} dBm", 0, RSSI_Y)
+    # Envía solo las páginas que contienen el RSSI en una transacción I2C
+    i2c.writeto(OLED_ADDR, RSSI_VENTANA)
+    i2c.writevto(OLED_ADDR, (b"\x40", rssi_paginas))
 
-def receiver_loop(nrf):
+def oled_worker():
+    """
+    Bucle del núcleo 1: muestra el RSSI pendiente en la OLED. Todas las
+    transacciones I2C ocurren en este núcleo, así la recepción en el
+    núcleo 0 no espera a la pantalla
+    """
+    global dirty
+
+    while True:
+        with oled_lock:
+            rssi = latest_rssi if dirty else None
+            dirty = False
+        if rssi is not None:
+            try:
+                mostrar_en_oled(rssi)
+            except OSError as e:
+                # Un fallo de I2C no debe detener el hilo de la pantalla
+                print("Error al actualizar la OLED:", e)
+        utime.sleep_ms(20)  # Como máximo ~50 refrescos por segundo
+
+async def receiver_loop(nrf):
     """
     Bucle principal de recepción
     
     Args:
         nrf: Objeto NRF24L01 inicializado
     """
+    global latest_rssi, dirty
+
     # Inicia el modo de escucha
     nrf.start_listening()
     print("\nEscuchando transmisiones...")
+
+    # Búfer de recepción reutilizado: el bucle no reserva memoria por
+    # paquete y evita pausas del recolector de basura
+    rx_buf = bytearray(PAYLOAD_SIZE)
+
+    # Si la línea IRQ está cableada, la interrupción despierta al bucle
+    # en lugar de sondear periódicamente
+    rx_flag = None
+    if IRQ_PIN is not None:
+        rx_flag = asyncio.ThreadSafeFlag()
+        irq = Pin(IRQ_PIN, Pin.IN, Pin.PULL_UP)
+        irq.irq(trigger=Pin.IRQ_FALLING, handler=lambda p: rx_flag.set())
     
     while True:
         if nrf.any():  # Verifica si hay datos disponibles
-            led.on()  # Enciende LED para indicar recepción
+            led_on()  # Enciende LED para indicar recepción
+            recibidos = [] if DEBUG else None  # RSSI a imprimir tras vaciar el FIFO
+            ultimo = None   # Último RSSI válido de la ráfaga
             
-            # Procesa todos los paquetes en la cola
-            while nrf.any():
-                buf = nrf.recv()  # Recibe el paquete
-                if len(buf) == 8:  # Verifica tamaño correcto
-                    try:
-                        # Desempaqueta los dos enteros: ID y RSSI
-                        msg_id, rssi = struct.unpack("ii", buf)
-                        # Solo muestra el RSSI, sin el ID
-                        print(f"Recibido RSSI: {rssi} dBm")
-                        mostrar_en_oled(rssi)
-                    except Exception as e:
-                        print("Error de decodificación:", e)
-                utime.sleep_ms(50)  # Pequeña pausa entre paquetes
+            # Vacía el FIFO sin pausas para evitar su desbordamiento; el
+            # primer paquete ya está confirmado y los siguientes se detectan
+            # con el STATUS que devuelve cada recv_into()
+            while True:
+                nrf.recv_into(rx_buf)  # Recibe el paquete
+                try:
+                    # Desempaqueta la secuencia y las mediciones de RSSI
+                    valores = struct.unpack_from(MSG_FMT, rx_buf, 0)
+                    if DEBUG:
+                        recibidos.extend(valores[1:])  # Sin la secuencia
+                    ultimo = valores[-1]  # Solo se guarda el último valor
+                except Exception as e:
+                    print("Error de decodificación:", e)
+                if not nrf.quedan_paquetes():
+                    break
                 
             # Apaga el LED al terminar de procesar paquetes
-            led.off()
-            
-        utime.sleep_ms(100)  # Pequeña pausa entre comprobaciones
+            led_off()
+
+            # Solo muestra el RSSI, sin el ID
+            if DEBUG:
+                for rssi in recibidos:
+                    print(f"Recibido RSSI: {rssi} dBm")
+
+            # Publica el último valor para el núcleo 1: un solo refresco
+            # de la OLED por ráfaga
+            if ultimo is not None:
+                with oled_lock:
+                    latest_rssi = ultimo
+                    dirty = True
+
+        if rx_flag is not None:
+            await rx_flag.wait()  # Espera la interrupción del NRF24L01
+        else:
+            await asyncio.sleep_ms(5)  # Sondeo breve sin bloquear la CPU
 
-def main():
+async def main():
     """
     Función principal del programa
     """
@@ -122,11 +273,12 @@ def main():
     try:
         # Inicializa el módulo NRF24L01
         nrf = setup_nrf24l01()
-        # Inicia el bucle de recepción
-        receiver_loop(nrf)
+        # Lanza la OLED en el núcleo 1 e inicia el bucle de recepción
+        _thread.start_new_thread(oled_worker, ())
+        await receiver_loop(nrf)
     except Exception as e:
         print(f"Error al configurar NRF24L01: {e}")
 
 # Punto de entrada del programa
 if __name__ == "__main__": 
-    main()
+    asyncio.run(main())
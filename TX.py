@@ -2,12 +2,26 @@
 import struct  # Para empaquetar/desempaquetar datos binarios
 import time    # Para funciones de retardo
 import math    # Para cálculos matemáticos (desviación estándar)
+import micropython  # Decoradores del emisor de código nativo
 from machine import Pin, SPI  # Módulos para control de GPIO y comunicación SPI
 from nrf24l01 import NRF24L01  # Librería para controlar el transceptor NRF24L01
 import network  # Para gestionar conexiones WiFi
 
 # Configuración del botón en el pin GPIO 18 con resistencia pull-up interna
 boton = Pin(18, Pin.IN, Pin.PULL_UP)
+REBOTE_MS = 300  # Tiempo de espera para los rebotes tras soltar el botón
+
+# Bandera activada por la interrupción del botón (evita sondearlo sin pausa)
+boton_presionado = False
+
+def al_presionar_boton(pin):
+    """
+    Manejador de interrupción del botón: solo marca la pulsación
+    """
+    global boton_presionado
+    boton_presionado = True
+
+boton.irq(trigger=Pin.IRQ_FALLING, handler=al_presionar_boton)
 
 # Configuración de credenciales WiFi
 # 🚨 Sección para personalizar con tus propias credenciales
@@ -39,23 +53,64 @@ MOSI_PIN = 3    # Pin Master Out Slave In (datos salientes)
 MISO_PIN = 4    # Pin Master In Slave Out (datos entrantes)
 CSN_PIN = 5     # Pin Chip Select (selección de chip)
 CE_PIN = 6      # Pin Chip Enable (habilitación de chip)
+SPI_BAUDRATE = 8_000_000  # Reloj SPI en Hz (el NRF24L01 admite hasta 10 MHz)
 
 # Parámetros de configuración del NRF24L01
 CANAL_RF = 46                # Canal de radiofrecuencia (0-125)
 TX_ADDRESS = b"\xe1\xf0\xf0\xf0\xf0"  # Dirección de transmisión (5 bytes)
-PAYLOAD_SIZE = 8             # Tamaño del paquete de datos en bytes
+NUM_MEDICIONES = 10          # Mediciones de RSSI por pulsación del botón
+MUESTREO_MS = 10             # Pausa entre mediciones de RSSI en ms
+# Formato del paquete: número de secuencia (uint16) y las 10 mediciones
+# (int16), todas en un único paquete para una sola transmisión
+MSG_FMT = "<H%dh" % NUM_MEDICIONES
+PAYLOAD_SIZE = struct.calcsize(MSG_FMT)  # Tamaño del paquete (22 bytes)
+
+# Registro opcional de mediciones en la memoria flash
+GUARDAR_LOG = True
+LOG_PATH = "RSSI_Medicion.txt"
+
+# Búfer reutilizado para cada paquete, evita asignar memoria al transmitir
+tx_buf = bytearray(PAYLOAD_SIZE)
+seq = 0  # Número de secuencia del último paquete enviado
+
+class NRF24L01Rapido(NRF24L01):
+    """
+    NRF24L01 que consulta STATUS con un NOP de un byte en lugar de leer el
+    registro completo mientras espera el fin de la transmisión
+    """
+    def leer_status(self):
+        """
+        Lee STATUS con un único comando NOP (0xFF) de un byte
+        """
+        self.cs(0)
+        self.spi.readinto(self.buf, 0xFF)
+        self.cs(1)
+        return self.buf[0]
+
+    def send_done(self):
+        # TX_DS | MAX_RT a partir de un NOP en lugar de leer el registro STATUS
+        if not (self.leer_status() & 0x30):
+            return None  # Transmisión aún en curso
+        status = self.reg_write(0x07, 0x70)  # Limpia RX_DR, TX_DS y MAX_RT
+        self.reg_write(0x00, self.reg_read(0x00) & ~0x02)  # Apaga (PWR_UP=0)
+        return 1 if status & 0x20 else 2
 
 def setup_nrf24l01():
     """
     Configura e inicializa el módulo NRF24L01
     """
     # Inicialización del bus SPI con los pines definidos
-    spi = SPI(SPI_ID, sck=Pin(SCK_PIN), mosi=Pin(MOSI_PIN), miso=Pin(MISO_PIN))
+    spi = SPI(SPI_ID, baudrate=SPI_BAUDRATE, polarity=0, phase=0,
+              sck=Pin(SCK_PIN), mosi=Pin(MOSI_PIN), miso=Pin(MISO_PIN))
     csn = Pin(CSN_PIN, mode=Pin.OUT, value=1)  # CSN inicia en alto (inactivo)
     ce = Pin(CE_PIN, mode=Pin.OUT, value=0)    # CE inicia en bajo (modo standby)
     
     # Creación del objeto NRF24L01
-    nrf = NRF24L01(spi, csn, ce, payload_size=PAYLOAD_SIZE)
+    nrf = NRF24L01Rapido(spi, csn, ce, payload_size=PAYLOAD_SIZE)
+    # El driver reconfigura el SPI a 4 MHz al crearse: se restaura la
+    # frecuencia deseada. El retardo CE->CSN (Tpece2csn, 4 µs) ya lo cumplen
+    # las esperas del driver tras subir CE (15 µs al enviar, 130 µs al escuchar)
+    nrf.init_spi(SPI_BAUDRATE)
     
     # Configuración del canal RF
     nrf.set_channel(CANAL_RF)
@@ -77,72 +132,100 @@ def setup_nrf24l01():
     # Apertura del canal de transmisión con la dirección especificada
     nrf.open_tx_pipe(TX_ADDRESS)
     
+    # Transmisión sin confirmación: las mediciones toleran perder un paquete,
+    # así se evitan las esperas por ACK y los reenvíos (tiempos variables)
+    # NOTA: debe coincidir con el receptor
+    nrf.reg_write(0x01, 0x00)  # EN_AA: auto-ACK desactivado en todas las tuberías
+    nrf.reg_write(0x04, 0x00)  # SETUP_RETR: sin retransmisiones automáticas
+    
     print(f"NRF24L01 configurado en canal {CANAL_RF}")
     return nrf
 
 def medir_rssi():
     """
-    Realiza 10 mediciones del nivel de señal WiFi (RSSI) y guarda los resultados
+    Realiza NUM_MEDICIONES mediciones del nivel de señal WiFi (RSSI) y las devuelve,
+    guardándolas también en un archivo si GUARDAR_LOG está activo
+
+    Returns:
+        Lista con los valores RSSI medidos en dBm
     """
     rssi_values = []  # Lista para almacenar valores de RSSI
+    suma = 0          # Suma acumulada de RSSI
+    suma_cuad = 0     # Suma acumulada de RSSI al cuadrado
     
-    # Realiza 10 mediciones consecutivas
-    for i in range(10):
+    # Realiza las mediciones consecutivas
+    for i in range(NUM_MEDICIONES):
         if wifi.isconnected():
             rssi = wifi.status('rssi')  # Obtiene el RSSI actual
         else:
             rssi = -100  # Valor predeterminado si no hay conexión
         print(f"Medición {i+1}: RSSI = {rssi} dBm")
         rssi_values.append(rssi)
-        time.sleep(0.1)  # Pequeña pausa entre mediciones
+        suma += rssi
+        suma_cuad += rssi * rssi
+        time.sleep_ms(MUESTREO_MS)  # Pequeña pausa entre mediciones
     
-    # Cálculo de estadísticas básicas
-    avg_rssi = sum(rssi_values) / len(rssi_values)  # Promedio
-    # Cálculo de desviación estándar
-    std_dev_rssi = math.sqrt(sum([(x - avg_rssi) ** 2 for x in rssi_values]) / len(rssi_values))
+    # Cálculo de estadísticas básicas a partir de las sumas acumuladas,
+    # sin recorrer de nuevo la lista ni crear listas temporales
+    n = len(rssi_values)
+    avg_rssi = suma / n  # Promedio
+    # Desviación estándar: var = E[x²] - E[x]² (max evita negativos por redondeo)
+    std_dev_rssi = math.sqrt(max(suma_cuad / n - avg_rssi * avg_rssi, 0))
     
     print(f"Promedio RSSI: {avg_rssi:.2f} dBm")
     print(f"Desviación estándar: {std_dev_rssi:.2f} dBm")
     
-    # Guarda las mediciones en un archivo
-    with open("RSSI_Medicion.txt", "w") as log:
-        for i, val in enumerate(rssi_values):
-            log.write(f"{i},{val}\n")
+    # Guarda las mediciones en un archivo (solo como registro)
+    if GUARDAR_LOG:
+        with open(LOG_PATH, "w") as log:
+            for i, val in enumerate(rssi_values):
+                log.write(f"{i},{val}\n")
+    
+    return rssi_values
+
+@micropython.native
+def emitir_paquete(nrf, seq, rssi_values):
+    """
+    Empaqueta las mediciones en el búfer reutilizado y las envía; compilada
+    a código máquina por ser la parte que se ejecuta en cada paquete
+
+    Args:
+        nrf: Objeto NRF24L01 inicializado
+        seq: Número de secuencia del paquete
+        rssi_values: Lista de NUM_MEDICIONES valores RSSI en dBm
+    """
+    struct.pack_into(MSG_FMT, tx_buf, 0, seq, *rssi_values)
+    nrf.send(tx_buf)
 
-def transmitir_archivo(nrf, file_path):
+def transmitir_lista(nrf, rssi_values):
     """
-    Lee un archivo de mediciones y transmite los datos usando el NRF24L01
+    Transmite directamente desde memoria todas las mediciones en un único
+    paquete usando el NRF24L01
     
     Args:
         nrf: Objeto NRF24L01 inicializado
-        file_path: Ruta al archivo de mediciones
+        rssi_values: Lista de NUM_MEDICIONES valores RSSI en dBm
     """
+    global seq
+
+    seq = (seq + 1) & 0xFFFF
     try:
-        with open(file_path, "r") as file:
-            for line in file:
-                # Parsea cada línea del archivo (formato: "índice,valor_rssi")
-                partes = line.strip().split(",")
-                if len(partes) == 2:
-                    try:
-                        idx = int(partes[0])  # Índice de la medición
-                        rssi = int(partes[1])  # Valor RSSI
-                        # Empaqueta los datos como dos enteros para transmisión
-                        payload = struct.pack("ii", idx, rssi)
-                        # Envía el paquete de datos
-                        nrf.send(payload)
-                        # Solo mostramos el valor RSSI, sin el ID
-                        print(f"Enviado RSSI: {rssi} dBm")
-                        time.sleep(0.1)  # Pequeña pausa entre transmisiones
-                    except ValueError:
-                        print("Línea malformada:", line)
-        print("Archivo enviado exitosamente.")
+        # Sin auto-ACK no se detectan pérdidas: send() solo espera a que el
+        # paquete salga al aire (o agota su tiempo sin error) y un paquete
+        # perdido se acepta como tal, no se reenvía
+        emitir_paquete(nrf, seq, rssi_values)
+        for rssi in rssi_values:
+            print(f"Enviado RSSI: {rssi} dBm")
+        print("Mediciones enviadas (sin confirmación de recepción).")
     except Exception as e:
-        print(f"Error al transmitir archivo: {e}")
+        print(f"Error al transmitir mediciones: {e}")
 
 def main():
     """
     Función principal del programa
     """
+    global boton_presionado
+
     print("\n--- Transmisor NRF24L01 listo ---")
     try:
         # Inicializa el módulo NRF24L01
@@ -151,14 +234,24 @@ def main():
         print(f"Error al configurar NRF24L01: {e}")
         return
     
-    # Bucle principal - espera a que se presione el botón
+    # Ignora las pulsaciones ocurridas durante la conexión WiFi
+    boton_presionado = False
+    
+    # Bucle principal - espera a que la interrupción marque el botón
     while True:
-        if boton.value() == 0:  # Botón presionado (lógica invertida por pull-up)
+        if boton_presionado:  # Flanco de bajada (lógica invertida por pull-up)
             print("Botón presionado, midiendo RSSI...")
-            medir_rssi()  # Realiza mediciones de RSSI
-            # Transmite el archivo de mediciones vía NRF24L01
-            transmitir_archivo(nrf, "RSSI_Medicion.txt")
-            time.sleep(2)  # Evita rebotes del botón
+            rssi_values = medir_rssi()  # Realiza mediciones de RSSI
+            # Transmite las mediciones vía NRF24L01
+            transmitir_lista(nrf, rssi_values)
+            # Espera a que se suelte el botón y a que pasen los rebotes de la
+            # liberación antes de aceptar una nueva pulsación
+            while boton.value() == 0:
+                time.sleep_ms(20)
+            time.sleep_ms(REBOTE_MS)
+            boton_presionado = False  # Descarta la pulsación atendida y sus rebotes
+        else:
+            time.sleep_ms(20)  # Espera en reposo sin consumir la CPU
 
 # Punto de entrada del programa
 if __name__ == "__main__": 